@@ -3,22 +3,28 @@
 # please don't look at this code too hard, it's a mess.
 
 from fnmatch import fnmatch
+import glob
 import logging
 import os
+import re
 from pathlib import PurePath
 import time
 
+from bisect import bisect_right, insort
 from collections import Counter, defaultdict, deque
+from itertools import compress
+from operator import itemgetter
 from logging.handlers import QueueHandler
 from multiprocessing import cpu_count, Process, Queue as MPQueue
 from multiprocessing.connection import Connection
 from multiprocessing.shared_memory import SharedMemory
-from queue import Empty
-from sys import exit
-from threading import Condition, Thread
+from queue import Empty, Full
+from sys import exit, intern
+from threading import Condition, Event, Thread
 from time import sleep
 
 from legendary.downloader.mp.workers import DLWorker, FileWorker
+from legendary.lfs.utils import list_files
 from legendary.models.downloading import *
 from legendary.models.game import GameAsset
 from legendary.models.manifest import ManifestComparison, Manifest, CDL, ChunkInfo
@@ -60,9 +66,10 @@ class DLManager(Process):
 
         # Analysis stuff
         self.analysis: Optional[AnalysisResult] = None
-        self.tasks: deque[FileTask | ChunkTask] = deque()
+        self.tasks: list[FileTask | ChunkTask] = []
         self.chunks_to_dl: deque[int] = deque()
         self.chunk_data_list: Optional[CDL] = None
+        self.chunks_by_guid: dict[int, ChunkInfo] = dict()
 
         # shared memory stuff
         self.max_shared_memory = max_shared_memory  # 1 GiB by default
@@ -83,23 +90,80 @@ class DLManager(Process):
         self.children = []
         self.threads = []
         self.conditions = []
-        # bytes downloaded and decompressed since last report
-        self.bytes_downloaded_since_last = 0
-        self.bytes_decompressed_since_last = 0
-        # bytes written since last report
-        self.bytes_written_since_last = 0
-        # bytes read since last report
-        self.bytes_read_since_last = 0
-        # chunks written since last report
-        self.num_processed_since_last = 0
-        self.num_tasks_processed_since_last = 0
+        # running totals, only ever increased by the thread that owns them and never reset, so the
+        # main loop can read them to determine what changed since the last report without losing updates
+        # bytes downloaded and decompressed
+        self.bytes_downloaded = 0
+        self.bytes_decompressed = 0
+        # bytes written
+        self.bytes_written = 0
+        # bytes read
+        self.bytes_read = 0
+        # chunks written and tasks processed
+        self.num_processed = 0
+        self.num_tasks_processed = 0
 
     @staticmethod
-    def matches(file, excludelist):
-        for pattern in excludelist:
-            if PurePath(file).full_match(pattern):
+    def compile_exclude_patterns(patterns):
+        """
+        Compile glob-style patterns (same semantics as PurePath.full_match) into a single matcher function.
+
+        Patterns with a literal directory part are grouped by that directory so only the file name has to be
+        checked against them, all remaining patterns are merged into one regular expression.
+
+        :param patterns: list of patterns to match against
+        :return: function returning True if a path matches any of the patterns
+        """
+        flags = re.IGNORECASE if os.name == 'nt' else 0
+        generic = []
+        anchored = defaultdict(list)
+        for pattern in patterns:
+            pattern = PurePath(pattern)
+            if not pattern.parts:
+                continue
+
+            parent = str(pattern.parent)
+            if parent != '.' and pattern.name != '**' and not glob.has_magic(parent):
+                anchored[os.path.normcase(parent)].append(pattern.name)
+            else:
+                generic.append(str(pattern))
+
+        def _compile(_patterns):
+            return re.compile('|'.join(glob.translate(p, recursive=True, include_hidden=True, seps=os.sep)
+                                       for p in _patterns), flags)
+
+        generic_re = _compile(generic) if generic else None
+        anchored_re = {parent: _compile(names) for parent, names in anchored.items()}
+
+        def match(file):
+            if generic_re and generic_re.match(file):
                 return True
-        return False
+            if anchored_re and (name_re := anchored_re.get(os.path.normcase(os.path.dirname(file)))):
+                return name_re.match(os.path.basename(file)) is not None
+            return False
+
+        return match
+
+    @staticmethod
+    def skip_files(mc: ManifestComparison, filenames: set):
+        """
+        Move files that should not be downloaded from added/changed to unchanged
+
+        :param mc: ManifestComparison to update
+        :param filenames: set of file names to skip
+        """
+        # only touch the names that are actually being downloaded, the rest already is in unchanged
+        added = mc.added & filenames
+        changed = mc.changed & filenames
+        mc.added -= added
+        mc.changed -= changed
+        mc.unchanged |= added
+        mc.unchanged |= changed
+
+    @staticmethod
+    def matches(file, excludelist):
+        # only kept for external callers, this compiles the patterns on every call; use compile_exclude_patterns()
+        return DLManager.compile_exclude_patterns(excludelist)(file)
 
     def run_analysis(self, manifest: Manifest, old_manifest: Manifest = None,
                      patch=True, resume=True, file_prefix_filter=None,
@@ -124,10 +188,28 @@ class DLManager(Process):
         :return: AnalysisResult
         """
 
+        # file names end up as keys in most of the sets/dicts below, interning them (including the ones of
+        # the old manifest) means equal names are the same object and lookups can compare by identity.
+        for fm in manifest.file_manifest_list.elements:
+            fm.filename = intern(fm.filename)
+        if old_manifest:
+            for fm in old_manifest.file_manifest_list.elements:
+                fm.filename = intern(fm.filename)
+
+        # pull the size columns out of the manifest once, sums/maxima over them then run entirely in C
+        chunk_list = manifest.chunk_data_list.elements
+        file_sizes = [fm.file_size for fm in manifest.file_manifest_list.elements]
+        chunk_file_sizes = [c.file_size for c in chunk_list]
+        chunk_window_sizes = [c.window_size for c in chunk_list]
+        # filename -> FileManifest maps for the lookups in the loops below
+        files_by_name = {fm.filename: fm for fm in manifest.file_manifest_list.elements}
+        old_files_by_name = {fm.filename: fm for fm in old_manifest.file_manifest_list.elements} \
+            if old_manifest else dict()
+
         analysis_res = AnalysisResult()
-        analysis_res.install_size = sum(fm.file_size for fm in manifest.file_manifest_list.elements)
-        analysis_res.biggest_chunk = max(c.window_size for c in manifest.chunk_data_list.elements)
-        analysis_res.biggest_file_size = max(f.file_size for f in manifest.file_manifest_list.elements)
+        analysis_res.install_size = sum(file_sizes)
+        analysis_res.biggest_chunk = max(chunk_window_sizes)
+        analysis_res.biggest_file_size = max(file_sizes)
         is_1mib = analysis_res.biggest_chunk == 1024 * 1024
         self.log.debug(f'Biggest chunk size: {analysis_res.biggest_chunk} bytes (== 1 MiB? {is_1mib})')
 
@@ -135,23 +217,30 @@ class DLManager(Process):
         mc = ManifestComparison.create(manifest, old_manifest)
         analysis_res.manifest_comparison = mc
 
+        # file hashes are needed for the resume file, both for checking and writing it
+        self.hash_map = {fm.filename: fm.sha_hash.hex() for fm in manifest.file_manifest_list.elements}
+
         if resume and self.resume_file and os.path.exists(self.resume_file):
             self.log.info('Found previously interrupted download. Download will be resumed if possible.')
             try:
                 missing = 0
                 mismatch = 0
                 completed_files = set()
-
-                for line in open(self.resume_file, encoding='utf-8').readlines():
-                    file_hash, _, filename = line.strip().partition(':')
-                    _p = os.path.join(self.dl_dir, filename)
-                    if not os.path.exists(_p):
-                        self.log.debug(f'File does not exist but is in resume file: "{_p}"')
-                        missing += 1
-                    elif file_hash != manifest.file_manifest_list.get_file_by_path(filename).sha_hash.hex():
-                        mismatch += 1
-                    else:
-                        completed_files.add(filename)
+                # walk the install directory once instead of checking each file individually,
+                # paths that are not found are still checked directly (e.g. case-insensitive file systems)
+                existing_files = list_files(self.dl_dir)
+
+                with open(self.resume_file, encoding='utf-8') as rf:
+                    for line in rf:
+                        file_hash, filename = line.rstrip('\n').split(':', 1)
+                        if filename not in existing_files and \
+                                not os.path.exists(_p := os.path.join(self.dl_dir, filename)):
+                            self.log.debug(f'File does not exist but is in resume file: "{_p}"')
+                            missing += 1
+                        elif file_hash != self.hash_map[filename]:
+                            mismatch += 1
+                        else:
+                            completed_files.add(filename)
 
                 if missing:
                     self.log.warning(f'{missing} previously completed file(s) are missing, they will be redownloaded.')
@@ -159,9 +248,7 @@ class DLManager(Process):
                     self.log.warning(f'{mismatch} existing file(s) have been changed and will be redownloaded.')
 
                 # remove completed files from changed/added and move them to unchanged for the analysis.
-                mc.added -= completed_files
-                mc.changed -= completed_files
-                mc.unchanged |= completed_files
+                DLManager.skip_files(mc, completed_files)
                 self.log.info(f'Skipping {len(completed_files)} files based on resume data.')
             except Exception as e:
                 self.log.warning(f'Reading resume file failed: {e!r}, continuing as normal...')
@@ -170,14 +257,15 @@ class DLManager(Process):
             # Basic check if files exist locally, put all missing files into "added"
             # This allows new SDL tags to be installed without having to do a repair as well.
             missing_files = set()
+            files_to_check = [fm.filename for fm in manifest.file_manifest_list.elements
+                              if fm.filename not in mc.added]
 
-            for fm in manifest.file_manifest_list.elements:
-                if fm.filename in mc.added:
-                    continue
-
-                local_path = os.path.join(self.dl_dir, fm.filename)
-                if not os.path.exists(local_path):
-                    missing_files.add(fm.filename)
+            if files_to_check:
+                # same as above, one directory walk with a direct check only for files that were not found
+                existing_files = list_files(self.dl_dir)
+                for filename in files_to_check:
+                    if filename not in existing_files and not os.path.exists(os.path.join(self.dl_dir, filename)):
+                        missing_files.add(filename)
 
             self.log.info(f'Found {len(missing_files)} missing files.')
             mc.added |= missing_files
@@ -186,52 +274,71 @@ class DLManager(Process):
 
         # Install tags are used for selective downloading, e.g. for language packs
         additional_deletion_tasks = []
+        tag_set = include_untagged = None
         if file_install_tag is not None:
             if isinstance(file_install_tag, str):
                 file_install_tag = [file_install_tag]
+            tag_set = set(file_install_tag)
+            # an empty tag selects files that do not have any install tags
+            include_untagged = any(not fit for fit in file_install_tag)
 
-            files_to_skip = set(i.filename for i in manifest.file_manifest_list.elements
-                                if not any((fit in i.install_tags) or (not fit and not i.install_tags)
-                                           for fit in file_install_tag))
-            self.log.info(f'Found {len(files_to_skip)} files to skip based on install tag.')
-            mc.added -= files_to_skip
-            mc.changed -= files_to_skip
-            mc.unchanged |= files_to_skip
-            for fname in sorted(files_to_skip):
-                additional_deletion_tasks.append(FileTask(fname, flags=TaskFlags.DELETE_FILE | TaskFlags.SILENT))
-
-        # if include/exclude prefix has been set: mark all files that are not to be downloaded as unchanged
+        # str.startswith() accepts a tuple, so all prefixes are checked in a single call
+        exclude_prefixes = include_prefixes = None
         if file_exclude_filter:
             if isinstance(file_exclude_filter, str):
                 file_exclude_filter = [file_exclude_filter]
+            exclude_prefixes = tuple(f.lower() for f in file_exclude_filter)
 
-            file_exclude_filter = [f.lower() for f in file_exclude_filter]
-            files_to_skip = set(i.filename for i in manifest.file_manifest_list.elements if
-                                any(i.filename.lower().startswith(pfx) for pfx in file_exclude_filter))
-            self.log.info(f'Found {len(files_to_skip)} files to skip based on exclude prefix.')
-            mc.added -= files_to_skip
-            mc.changed -= files_to_skip
-            mc.unchanged |= files_to_skip
-
+        exclude_match = None
         if file_exclude_configured:
             if isinstance(file_exclude_configured, str):
                 file_exclude_configured = [file_exclude_configured]
-            files_to_skip = set(i.filename for i in manifest.file_manifest_list.elements if DLManager.matches(i.filename.lower().replace('/', os.sep).replace('\\', os.sep), file_exclude_configured))
-            mc.added -= files_to_skip
-            mc.changed -= files_to_skip
-            mc.unchanged |= files_to_skip
+            exclude_match = DLManager.compile_exclude_patterns(file_exclude_configured)
 
         if file_prefix_filter:
             if isinstance(file_prefix_filter, str):
                 file_prefix_filter = [file_prefix_filter]
+            include_prefixes = tuple(f.lower() for f in file_prefix_filter)
+
+        # run all filters in a single pass over the file list, only the tag filter needs its own list of names
+        # (for deletion tasks), the others just add to the combined set and count their matches for logging.
+        skip_tag = []
+        files_to_skip = set()
+        num_skip_exclude = num_skip_prefix = 0
+        if tag_set is not None or exclude_prefixes or exclude_match or include_prefixes:
+            for fm in manifest.file_manifest_list.elements:
+                filename = fm.filename
+                filename_lower = filename.lower()
+                skip = False
+
+                if tag_set is not None and tag_set.isdisjoint(fm.install_tags) \
+                        and not (include_untagged and not fm.install_tags):
+                    skip_tag.append(filename)
+                    skip = True
+                if exclude_prefixes and filename_lower.startswith(exclude_prefixes):
+                    num_skip_exclude += 1
+                    skip = True
+                if exclude_match and exclude_match(filename_lower.replace('/', os.sep).replace('\\', os.sep)):
+                    skip = True
+                if include_prefixes and not filename_lower.startswith(include_prefixes):
+                    num_skip_prefix += 1
+                    skip = True
+
+                if skip:
+                    files_to_skip.add(filename)
+
+        if tag_set is not None:
+            self.log.info(f'Found {len(skip_tag)} files to skip based on install tag.')
+            for fname in sorted(skip_tag):
+                additional_deletion_tasks.append(FileTask(fname, flags=TaskFlags.DELETE_FILE | TaskFlags.SILENT))
+        if exclude_prefixes:
+            self.log.info(f'Found {num_skip_exclude} files to skip based on exclude prefix.')
+        if include_prefixes:
+            self.log.info(f'Found {num_skip_prefix} files to skip based on include prefix(es)')
 
-            file_prefix_filter = [f.lower() for f in file_prefix_filter]
-            files_to_skip = set(i.filename for i in manifest.file_manifest_list.elements if not
-                                any(i.filename.lower().startswith(pfx) for pfx in file_prefix_filter))
-            self.log.info(f'Found {len(files_to_skip)} files to skip based on include prefix(es)')
-            mc.added -= files_to_skip
-            mc.changed -= files_to_skip
-            mc.unchanged |= files_to_skip
+        # mark all files that are not to be downloaded as unchanged
+        if files_to_skip:
+            DLManager.skip_files(mc, files_to_skip)
 
         if file_prefix_filter or file_exclude_filter or file_install_tag:
             self.log.info(f'Remaining files after filtering: {len(mc.added) + len(mc.changed)}')
@@ -258,23 +365,23 @@ class DLManager(Process):
         elif processing_optimization:
             self.log.info('Processing order optimization is enabled, analysis may take a few seconds longer...')
 
+        # map chunk GUIDs to a dense index so per-chunk state can be kept in flat lists instead of hash tables
+        guid_idx = {c.guid_num: i for i, c in enumerate(chunk_list)}
         # count references to chunks for determining runtime cache size later
-        references = Counter()
+        references = [0] * len(chunk_list)
         fmlist = sorted(manifest.file_manifest_list.elements,
                         key=lambda a: a.filename.lower())
 
         # Create reference count for chunks and calculate additional/temporary disk size required for install
         current_tmp_size = 0
         for fm in fmlist:
-            self.hash_map[fm.filename] = fm.sha_hash.hex()
-
             # chunks of unchanged files are not downloaded so we can skip them
             if fm.filename in mc.unchanged:
                 analysis_res.unchanged += fm.file_size
                 continue
 
             for cp in fm.chunk_parts:
-                references[cp.guid_num] += 1
+                references[guid_idx[cp.guid_num]] += 1
 
             if fm.filename in mc.added:
                 # if the file was added, it just adds to the delta
@@ -285,13 +392,13 @@ class DLManager(Process):
                 # but then subtract the size of the old file as it's deleted on write completion.
                 current_tmp_size += fm.file_size
                 analysis_res.disk_space_delta = max(current_tmp_size, analysis_res.disk_space_delta)
-                current_tmp_size -= old_manifest.file_manifest_list.get_file_by_path(fm.filename).file_size
+                current_tmp_size -= old_files_by_name[fm.filename].file_size
 
         # clamp to 0
         self.log.debug(f'Disk space delta: {analysis_res.disk_space_delta/1024/1024:.02f} MiB')
 
         if processing_optimization:
-            s_time = time.time()
+            s_time = time.perf_counter()
             # reorder the file manifest list to group files that share many chunks
             # 4 is mostly arbitrary but has shown in testing to be a good choice
             min_overlap = 4
@@ -300,6 +407,13 @@ class DLManager(Process):
 
             remaining_files = {fm.filename: {cp.guid_num for cp in fm.chunk_parts}
                                for fm in fmlist if fm.filename not in mc.unchanged}
+            file_order = {fname: i for i, fname in enumerate(remaining_files)}
+            # inverted index of chunk -> files using it, so only files that actually share chunks are compared
+            chunk_files = defaultdict(list)
+            for fname, chunks in remaining_files.items():
+                if len(chunks) >= cp_threshold:
+                    for guid in chunks:
+                        chunk_files[guid].append(fname)
             _fmlist = []
 
             # iterate over all files that will be downloaded and pair up those that share the most chunks
@@ -312,20 +426,24 @@ class DLManager(Process):
                 if len(f_chunks) < cp_threshold:
                     continue
 
+                # files that have already been processed are still in the index, skip them here
+                overlaps = Counter()
+                for guid in f_chunks:
+                    overlaps.update(fname for fname in chunk_files[guid] if fname in remaining_files)
+
                 best_overlap, match = 0, None
-                for fname, chunks in remaining_files.items():
-                    if len(chunks) < cp_threshold:
-                        continue
-                    overlap = len(f_chunks & chunks)
-                    if overlap > min_overlap and overlap > best_overlap:
-                        best_overlap, match = overlap, fname
+                if overlaps:
+                    # on ties prefer the file that comes first in the list
+                    match, best_overlap = max(overlaps.items(), key=lambda i: (i[1], -file_order[i[0]]))
+                    if best_overlap <= min_overlap:
+                        match = None
 
                 if match:
-                    _fmlist.append(manifest.file_manifest_list.get_file_by_path(match))
+                    _fmlist.append(files_by_name[match])
                     remaining_files.pop(match)
 
             fmlist = _fmlist
-            opt_delta = time.time() - s_time
+            opt_delta = time.perf_counter() - s_time
             self.log.debug(f'Processing optimizations took {opt_delta:.01f} seconds.')
 
         # determine reusable chunks and prepare lookup table for reusable ones
@@ -333,22 +451,30 @@ class DLManager(Process):
         if old_manifest and mc.changed and patch:
             self.log.debug('Analyzing manifests for re-usable chunks...')
             for changed in mc.changed:
-                old_file = old_manifest.file_manifest_list.get_file_by_path(changed)
-                new_file = manifest.file_manifest_list.get_file_by_path(changed)
+                old_file = old_files_by_name[changed]
+                new_file = files_by_name[changed]
 
+                # old chunk parts grouped by chunk and sorted by their offset within the chunk
                 existing_chunks = defaultdict(list)
                 off = 0
                 for cp in old_file.chunk_parts:
-                    existing_chunks[cp.guid_num].append((off, cp.offset, cp.offset + cp.size))
+                    existing_chunks[cp.guid_num].append((cp.offset, cp.offset + cp.size, off))
                     off += cp.size
+                for parts in existing_chunks.values():
+                    parts.sort()
 
                 for cp in new_file.chunk_parts:
-                    key = (cp.guid_num, cp.offset, cp.size)
-                    for file_o, cp_o, cp_end_o in existing_chunks[cp.guid_num]:
+                    if not (parts := existing_chunks.get(cp.guid_num)):
+                        continue
+
+                    cp_end = cp.offset + cp.size
+                    # only old parts starting at or before the new one can contain it, check those from closest
+                    for i in range(bisect_right(parts, cp.offset, key=itemgetter(0)) - 1, -1, -1):
+                        cp_o, cp_end_o, file_o = parts[i]
                         # check if new chunk part is wholly contained in the old chunk part
-                        if cp_o <= cp.offset and (cp.offset + cp.size) <= cp_end_o:
-                            references[cp.guid_num] -= 1
-                            re_usable[changed][key] = file_o + (cp.offset - cp_o)
+                        if cp_end <= cp_end_o:
+                            references[guid_idx[cp.guid_num]] -= 1
+                            re_usable[changed][(cp.guid_num, cp.offset, cp.size)] = file_o + (cp.offset - cp_o)
                             analysis_res.reuse_size += cp.size
                             break
 
@@ -361,28 +487,33 @@ class DLManager(Process):
                 cur_file_cps = dict()
                 cur_file_offset = 0
                 for cp in cur_file.chunk_parts:
-                    key = (cp.guid_num, cp.offset, cp.size)
-                    for wr_file_name, wr_file_offset, wr_cp_offset, wr_cp_end_offset in cur_written_cps[cp.guid_num]:
-                        # check if new chunk part is wholly contained in a written chunk part
-                        cur_cp_end_offset = cp.offset + cp.size
-                        if wr_cp_offset <= cp.offset and wr_cp_end_offset >= cur_cp_end_offset:
-                            references[cp.guid_num] -= 1
-                            reuse_offset = wr_file_offset + (cp.offset - wr_cp_offset)
-                            reusable_written[cur_file.filename][key] = (wr_file_name, reuse_offset)
-                            break
-                    cur_file_cps[cp.guid_num] = (cur_file.filename, cur_file_offset, cp.offset, cp.offset + cp.size)
+                    cur_cp_end_offset = cp.offset + cp.size
+                    # written parts are kept sorted by chunk offset, same lookup as for the old files above
+                    if wr_parts := cur_written_cps.get(cp.guid_num):
+                        for i in range(bisect_right(wr_parts, cp.offset, key=itemgetter(0)) - 1, -1, -1):
+                            wr_cp_offset, wr_cp_end_offset, wr_file_name, wr_file_offset = wr_parts[i]
+                            # check if new chunk part is wholly contained in a written chunk part
+                            if wr_cp_end_offset >= cur_cp_end_offset:
+                                references[guid_idx[cp.guid_num]] -= 1
+                                reuse_offset = wr_file_offset + (cp.offset - wr_cp_offset)
+                                key = (cp.guid_num, cp.offset, cp.size)
+                                reusable_written[cur_file.filename][key] = (wr_file_name, reuse_offset)
+                                break
+                    cur_file_cps[cp.guid_num] = (cp.offset, cur_cp_end_offset, cur_file.filename, cur_file_offset)
                     cur_file_offset += cp.size
 
                 for guid, value in cur_file_cps.items():
-                    cur_written_cps[guid].append(value)
+                    insort(cur_written_cps[guid], value, key=itemgetter(0))
 
         last_cache_size = current_cache_size = 0
-        # set to determine whether a file is currently cached or not
-        cached = set()
-        # Using this secondary set is orders of magnitude faster than checking the deque.
-        chunks_in_dl_list = set()
+        # every cache slot is sized for the biggest chunk, keep it in a local for the loop below
+        biggest_chunk = analysis_res.biggest_chunk
+        # flags (indexed like the chunk list) to determine whether a chunk is currently cached or not
+        cached = bytearray(len(chunk_list))
+        # Using this secondary list is orders of magnitude faster than checking the deque.
+        chunks_in_dl_list = bytearray(len(chunk_list))
         # This is just used to count all unique guids that have been cached
-        dl_cache_guids = set()
+        dl_cache_guids = bytearray(len(chunk_list))
 
         # run through the list of files and create the download jobs and also determine minimum
         # runtime cache requirement by simulating adding/removing from cache during download.
@@ -397,58 +528,59 @@ class DLManager(Process):
 
             existing_chunks = re_usable.get(current_file.filename, None)
             written_chunks = reusable_written.get(current_file.filename, None)
-            chunk_tasks = []
             reused = 0
+            # chunk tasks are added directly, the file open task is filled in once we know if chunks are re-used
+            open_task_idx = len(self.tasks)
+            self.tasks.append(None)
+            analysis_res.num_chunk_tasks += len(current_file.chunk_parts)
 
             for cp in current_file.chunk_parts:
-                ct = ChunkTask(cp.guid_num, cp.offset, cp.size)
-
                 # re-use the chunk from the existing file if we can
                 key = (cp.guid_num, cp.offset, cp.size)
                 if existing_chunks and key in existing_chunks:
                     reused += 1
-                    ct.chunk_file = current_file.filename
-                    ct.chunk_offset = existing_chunks[key]
+                    ct = ChunkTask(cp.guid_num, existing_chunks[key], cp.size, chunk_file=current_file.filename)
                 elif written_chunks and key in written_chunks:
-                    ct.chunk_file, ct.chunk_offset = written_chunks[key]
+                    chunk_file, chunk_offset = written_chunks[key]
+                    ct = ChunkTask(cp.guid_num, chunk_offset, cp.size, chunk_file=chunk_file)
                 else:
+                    ct = ChunkTask(cp.guid_num, cp.offset, cp.size)
+                    idx = guid_idx[cp.guid_num]
                     # add to DL list if not already in it
-                    if cp.guid_num not in chunks_in_dl_list:
+                    if not chunks_in_dl_list[idx]:
                         self.chunks_to_dl.append(cp.guid_num)
-                        chunks_in_dl_list.add(cp.guid_num)
+                        chunks_in_dl_list[idx] = 1
 
                     # if chunk has more than one use or is already in cache,
                     # check if we need to add or remove it again.
-                    if references[cp.guid_num] > 1 or cp.guid_num in cached:
-                        references[cp.guid_num] -= 1
+                    if references[idx] > 1 or cached[idx]:
+                        references[idx] -= 1
 
                         # delete from cache if no references left
-                        if references[cp.guid_num] < 1:
-                            current_cache_size -= analysis_res.biggest_chunk
-                            cached.remove(cp.guid_num)
+                        if references[idx] < 1:
+                            current_cache_size -= biggest_chunk
+                            cached[idx] = 0
                             ct.cleanup = True
                         # add to cache if not already cached
-                        elif cp.guid_num not in cached:
-                            dl_cache_guids.add(cp.guid_num)
-                            cached.add(cp.guid_num)
-                            current_cache_size += analysis_res.biggest_chunk
+                        elif not cached[idx]:
+                            dl_cache_guids[idx] = 1
+                            cached[idx] = 1
+                            current_cache_size += biggest_chunk
                     else:
                         ct.cleanup = True
 
-                chunk_tasks.append(ct)
+                self.tasks.append(ct)
 
             if reused:
                 self.log.debug(f' + Reusing {reused} chunks from: {current_file.filename}')
                 # open temporary file that will contain download + old file contents
-                self.tasks.append(FileTask(current_file.filename + u'.tmp', flags=TaskFlags.OPEN_FILE))
-                self.tasks.extend(chunk_tasks)
+                self.tasks[open_task_idx] = FileTask(current_file.filename + u'.tmp', flags=TaskFlags.OPEN_FILE)
                 self.tasks.append(FileTask(current_file.filename + u'.tmp', flags=TaskFlags.CLOSE_FILE))
                 # delete old file and rename temporary
                 self.tasks.append(FileTask(current_file.filename, old_file=current_file.filename + u'.tmp',
                                            flags=TaskFlags.RENAME_FILE | TaskFlags.DELETE_FILE))
             else:
-                self.tasks.append(FileTask(current_file.filename, flags=TaskFlags.OPEN_FILE))
-                self.tasks.extend(chunk_tasks)
+                self.tasks[open_task_idx] = FileTask(current_file.filename, flags=TaskFlags.OPEN_FILE)
                 self.tasks.append(FileTask(current_file.filename, flags=TaskFlags.CLOSE_FILE))
 
             if current_file.executable:
@@ -479,18 +611,17 @@ class DLManager(Process):
                               + message)
 
         # calculate actual dl and patch write size.
-        analysis_res.dl_size = \
-            sum(c.file_size for c in manifest.chunk_data_list.elements if c.guid_num in chunks_in_dl_list)
-        analysis_res.uncompressed_dl_size = \
-            sum(c.window_size for c in manifest.chunk_data_list.elements if c.guid_num in chunks_in_dl_list)
+        analysis_res.dl_size = sum(compress(chunk_file_sizes, chunks_in_dl_list))
+        analysis_res.uncompressed_dl_size = sum(compress(chunk_window_sizes, chunks_in_dl_list))
 
         # add jobs to remove files
         for fname in mc.removed:
             self.tasks.append(FileTask(fname, flags=TaskFlags.DELETE_FILE))
         self.tasks.extend(additional_deletion_tasks)
 
-        analysis_res.num_chunks_cache = len(dl_cache_guids)
+        analysis_res.num_chunks_cache = dl_cache_guids.count(1)
         self.chunk_data_list = manifest.chunk_data_list
+        self.chunks_by_guid = {c.guid_num: c for c in chunk_list}
         self.analysis = analysis_res
 
         return analysis_res
@@ -502,7 +633,7 @@ class DLManager(Process):
 
         # If we're not using signed URLs, just pretend the raw chunks are the signed ones
         for guid in self.chunks_to_dl:
-            self.signed_chunks_q.put((self.chunk_data_list.get_chunk_by_guid(guid), None))
+            self.signed_chunks_q.put((self.chunks_by_guid[guid], None))
 
 
     def _do_chunk_signing(self, sig_chunks_cond: Condition):
@@ -515,7 +646,7 @@ class DLManager(Process):
             self.log.debug('Fetching more chunk URLs...')
             num_of_chunks_to_fetch = min(len(self.chunks_to_dl), 50)
             unprocessed_chunk_ids = list(self.chunks_to_dl.popleft() for _ in range(num_of_chunks_to_fetch))
-            unprocessed_chunks = list(self.chunk_data_list.get_chunk_by_guid(guid) for guid in unprocessed_chunk_ids)
+            unprocessed_chunks = list(self.chunks_by_guid[guid] for guid in unprocessed_chunk_ids)
 
             if ticket.remaining_time < datetime.timedelta(minutes=5):
                 self.log.debug('Refreshing ticket')
@@ -595,23 +726,24 @@ class DLManager(Process):
     def dl_results_handler(self, task_cond: Condition):
         in_buffer = dict()
 
-        task = self.tasks.popleft()
+        # the task list is only ever consumed front to back, so walk it instead of popping from it
+        tasks = iter(self.tasks)
+        task = next(tasks)
         current_file = ''
 
         while task and self.running:
             if isinstance(task, FileTask):  # this wasn't necessarily a good idea...
                 try:
-                    self.writer_queue.put(WriterTask(**task.__dict__), timeout=1.0)
+                    self.writer_queue.put(WriterTask(task.filename, task.flags, old_file=task.old_file), timeout=1.0)
                     if task.flags & TaskFlags.OPEN_FILE:
                         current_file = task.filename
                 except Exception as e:
-                    self.tasks.appendleft(task)
+                    # task is kept and simply retried on the next iteration
                     self.log.warning(f'Adding to queue failed: {e!r}')
                     continue
 
-                try:
-                    task = self.tasks.popleft()
-                except IndexError:  # finished
+                task = next(tasks, None)
+                if task is None:  # finished
                     break
                 continue
 
@@ -635,12 +767,8 @@ class DLManager(Process):
                 if task.cleanup and not task.chunk_file:
                     del in_buffer[task.chunk_guid]
 
-                try:
-                    task = self.tasks.popleft()
-                    if isinstance(task, FileTask):
-                        break
-                except IndexError:  # finished
-                    task = None
+                task = next(tasks, None)
+                if task is None or isinstance(task, FileTask):
                     break
             else:  # only enter blocking code if the loop did not break
                 try:
@@ -652,8 +780,8 @@ class DLManager(Process):
                     if res.success:
                         self.log.debug(f'Download for {res.chunk_guid} succeeded, adding to in_buffer...')
                         in_buffer[res.chunk_guid] = res
-                        self.bytes_downloaded_since_last += res.size_downloaded
-                        self.bytes_decompressed_since_last += res.size_decompressed
+                        self.bytes_downloaded += res.size_downloaded
+                        self.bytes_decompressed += res.size_decompressed
                     else:
                         self.log.error(f'Download for {res.chunk_guid} failed, retrying...')
                         try:
@@ -671,45 +799,82 @@ class DLManager(Process):
 
         self.log.debug('Download result handler quitting...')
 
-    def fw_results_handler(self, shm_cond: Condition):
-        while self.running:
+    def fw_results_handler(self, shm_cond: Condition, tasks_done: Event):
+        num_tasks = len(self.tasks)
+        processed_tasks = 0
+        terminate = False
+
+        # the resume file is kept open for the rest of the download once the first file has been completed,
+        # completed files are appended once per batch using unbuffered writes on a file descriptor opened in
+        # append mode. It is not created any earlier so an abort before that doesn't leave an empty file behind.
+        resume_fd = None
+
+        while self.running and not terminate:
             try:
-                res = self.writer_result_q.get(timeout=1.0)
+                # the writer sends its results in batches, the job manager is only notified once per batch
+                results = self.writer_result_q.get(timeout=1.0)
+            except Empty:
+                continue
+            except Exception as e:
+                self.log.warning(f'Exception when trying to read writer result queue: {e!r}')
+                continue
 
+            released_memory = False
+            completed_files = []
+            for res in results:
                 if isinstance(res, TerminateWorkerTask):
                     self.log.debug('Got termination command in FW result handler')
+                    terminate = True
                     break
 
-                self.num_tasks_processed_since_last += 1
-
-                if res.flags & TaskFlags.CLOSE_FILE and self.resume_file and res.success:
-                    if res.filename.endswith('.tmp'):
-                        res.filename = res.filename[:-4]
-
-                    file_hash = self.hash_map[res.filename]
-                    # write last completed file to super simple resume file
-                    with open(self.resume_file, 'a', encoding='utf-8') as rf:
-                        rf.write(f'{file_hash}:{res.filename}\n')
+                try:
+                    self.num_tasks_processed += 1
+                    processed_tasks += 1
+                    if processed_tasks >= num_tasks:
+                        # wake up the main loop right away instead of letting it sleep out the update interval
+                        tasks_done.set()
+
+                    if res.flags & TaskFlags.CLOSE_FILE and self.resume_file and res.success:
+                        if res.filename.endswith('.tmp'):
+                            res.filename = res.filename[:-4]
+
+                        file_hash = self.hash_map[res.filename]
+                        completed_files.append(f'{file_hash}:{res.filename}\n')
+
+                    if not res.success:
+                        # todo make this kill the installation process or at least skip the file and mark it as failed
+                        self.log.fatal(f'Writing for {res.filename} failed!')
+                    if res.flags & TaskFlags.RELEASE_MEMORY:
+                        self.sms.appendleft(res.shared_memory)
+                        released_memory = True
+
+                    if res.chunk_guid:
+                        self.bytes_written += res.size
+                        # if there's no shared memory we must have read from disk.
+                        if not res.shared_memory:
+                            self.bytes_read += res.size
+                        self.num_processed += 1
+                except Exception as e:
+                    self.log.warning(f'Exception when handling writer result: {e!r}')
 
-                if not res.success:
-                    # todo make this kill the installation process or at least skip the file and mark it as failed
-                    self.log.fatal(f'Writing for {res.filename} failed!')
-                if res.flags & TaskFlags.RELEASE_MEMORY:
-                    self.sms.appendleft(res.shared_memory)
-                    with shm_cond:
-                        shm_cond.notify()
+            if released_memory:
+                with shm_cond:
+                    shm_cond.notify()
 
-                if res.chunk_guid:
-                    self.bytes_written_since_last += res.size
-                    # if there's no shared memory we must have read from disk.
-                    if not res.shared_memory:
-                        self.bytes_read_since_last += res.size
-                    self.num_processed_since_last += 1
+            if completed_files:
+                # write last completed files to super simple resume file
+                try:
+                    if resume_fd is None:
+                        resume_fd = os.open(self.resume_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    # os.write may write less than requested, make sure no partial line is left behind
+                    data = memoryview(''.join(completed_files).encode('utf-8'))
+                    while data:
+                        data = data[os.write(resume_fd, data):]
+                except Exception as e:
+                    self.log.warning(f'Failed to write to resume file: {e!r}')
 
-            except Empty:
-                continue
-            except Exception as e:
-                self.log.warning(f'Exception when trying to read writer result queue: {e!r}')
+        if resume_fd is not None:
+            os.close(resume_fd)
         self.log.debug('Writer result handler quitting...')
 
     def run(self):
@@ -732,10 +897,11 @@ class DLManager(Process):
             self.log.warning('Immediate exit requested!')
             self.running = False
 
-            # send conditions to unlock threads if they aren't already
+            # send conditions to unlock threads if they aren't already, all waiters have to wake up
+            # to see that we're no longer running (the flag is checked after every wait).
             for cond in self.conditions:
                 with cond:
-                    cond.notify()
+                    cond.notify_all()
 
             # make sure threads are dead.
             for t in self.threads:
@@ -759,12 +925,10 @@ class DLManager(Process):
             ]
             for name, q in queues:
                 self.log.debug(f'Cleaning up queue "{name}"')
-                try:
-                    while True:
-                        _ = q.get_nowait()
-                except Empty:
-                    q.close()
-                    q.join_thread()
+                # whatever is still queued is discarded anyway, so don't wait for our feeder threads to flush it
+                # into the pipes (which would block with nobody reading) and don't bother unpickling the rest.
+                q.cancel_join_thread()
+                q.close()
 
             # clean up connections
             pipes = [self.sign_pipe, self.ticket_pipe]
@@ -781,10 +945,10 @@ class DLManager(Process):
         self.log.debug(f'Created shared memory of size: {self.shared_memory.size / 1024 / 1024:.02f} MiB')
 
         # create the shared memory segments and add them to their respective pools
-        for i in range(int(self.shared_memory.size / self.analysis.biggest_chunk)):
-            _sms = SharedMemorySegment(offset=i * self.analysis.biggest_chunk,
-                                       end=i * self.analysis.biggest_chunk + self.analysis.biggest_chunk)
-            self.sms.append(_sms)
+        segment_size = self.analysis.biggest_chunk
+        num_segments = self.shared_memory.size // segment_size
+        self.sms.extend(SharedMemorySegment(offset=offset, end=offset + segment_size)
+                        for offset in range(0, num_segments * segment_size, segment_size))
 
         self.log.debug(f'Created {len(self.sms)} shared memory segments.')
 
@@ -814,101 +978,105 @@ class DLManager(Process):
         self.children.append(writer_p)
         writer_p.start()
 
-        num_chunk_tasks = sum(isinstance(t, ChunkTask) for t in self.tasks)
+        num_chunk_tasks = self.analysis.num_chunk_tasks
         num_dl_tasks = len(self.chunks_to_dl)
         num_tasks = len(self.tasks)
         num_shared_memory_segments = len(self.sms)
+        segment_size_mib = self.analysis.biggest_chunk / 1024 / 1024
         self.log.debug(f'Chunks to download: {num_dl_tasks}, File tasks: {num_tasks}, Chunk tasks: {num_chunk_tasks}')
 
         # active downloader tasks
         self.active_tasks = 0
         processed_chunks = 0
         processed_tasks = 0
-        total_dl = 0
-        total_write = 0
+        total_dl = total_dl_unc = 0
+        total_write = total_read = 0
 
         # synchronization conditions
         shm_cond = Condition()
         task_cond = Condition()
         sig_chunks_cond = Condition()
         self.conditions = [shm_cond, task_cond, sig_chunks_cond]
+        tasks_done = Event()
 
         # start threads
-        s_time = time.time()
+        s_time = time.perf_counter()
         self.threads.append(Thread(target=self.chunk_signing_manager, args=(sig_chunks_cond,)))
         self.threads.append(Thread(target=self.download_job_manager, args=(task_cond, shm_cond, sig_chunks_cond)))
         self.threads.append(Thread(target=self.dl_results_handler, args=(task_cond,)))
-        self.threads.append(Thread(target=self.fw_results_handler, args=(shm_cond,)))
+        self.threads.append(Thread(target=self.fw_results_handler, args=(shm_cond, tasks_done)))
 
         for t in self.threads:
             t.start()
 
-        last_update = time.time()
+        last_update = time.perf_counter()
 
         while processed_tasks < num_tasks:
-            delta = time.time() - last_update
+            # monotonic clock, read once per update
+            now = time.perf_counter()
+            delta = now - last_update
             if not delta:
                 time.sleep(self.update_interval)
                 continue
 
             # update all the things
-            processed_chunks += self.num_processed_since_last
-            processed_tasks += self.num_tasks_processed_since_last
-
-            total_dl += self.bytes_downloaded_since_last
-            total_write += self.bytes_written_since_last
-
-            dl_speed = self.bytes_downloaded_since_last / delta
-            dl_unc_speed = self.bytes_decompressed_since_last / delta
-            w_speed = self.bytes_written_since_last / delta
-            r_speed = self.bytes_read_since_last / delta
-            # c_speed = self.num_processed_since_last / delta
-
-            # set temporary counters to 0
-            self.bytes_read_since_last = self.bytes_written_since_last = 0
-            self.bytes_downloaded_since_last = self.num_processed_since_last = 0
-            self.bytes_decompressed_since_last = self.num_tasks_processed_since_last = 0
-            last_update = time.time()
+            processed_chunks = self.num_processed
+            processed_tasks = self.num_tasks_processed
+
+            # speeds are based on the difference to the totals of the previous update
+            bytes_downloaded, bytes_decompressed = self.bytes_downloaded, self.bytes_decompressed
+            bytes_written, bytes_read = self.bytes_written, self.bytes_read
+            dl_speed = (bytes_downloaded - total_dl) / delta
+            dl_unc_speed = (bytes_decompressed - total_dl_unc) / delta
+            w_speed = (bytes_written - total_write) / delta
+            r_speed = (bytes_read - total_read) / delta
+            total_dl, total_dl_unc = bytes_downloaded, bytes_decompressed
+            total_write, total_read = bytes_written, bytes_read
+            last_update = now
 
             perc = (processed_chunks / num_chunk_tasks) * 100
-            runtime = time.time() - s_time
-            total_avail = len(self.sms)
-            total_used = (num_shared_memory_segments - total_avail) * (self.analysis.biggest_chunk / 1024 / 1024)
-
-            if runtime and processed_chunks:
-                average_speed = processed_chunks / runtime
-                estimate = (num_chunk_tasks - processed_chunks) / average_speed
-                hours, estimate = int(estimate // 3600), estimate % 3600
-                minutes, seconds = int(estimate // 60), int(estimate % 60)
-
-                rt_hours, runtime = int(runtime // 3600), runtime % 3600
-                rt_minutes, rt_seconds = int(runtime // 60), int(runtime % 60)
-            else:
-                hours = minutes = seconds = 0
-                rt_hours = rt_minutes = rt_seconds = 0
-
-            self.log.info(f'= Progress: {perc:.02f}% ({processed_chunks}/{num_chunk_tasks}), '
-                          f'Running for {rt_hours:02d}:{rt_minutes:02d}:{rt_seconds:02d}, '
-                          f'ETA: {hours:02d}:{minutes:02d}:{seconds:02d}')
-            self.log.info(f' - Downloaded: {total_dl / 1024 / 1024:.02f} MiB, '
-                          f'Written: {total_write / 1024 / 1024:.02f} MiB')
-            self.log.info(f' - Cache usage: {total_used:.02f} MiB, active tasks: {self.active_tasks}')
-            self.log.info(f' + Download\t- {dl_speed / 1024 / 1024:.02f} MiB/s (raw) '
-                          f'/ {dl_unc_speed / 1024 / 1024:.02f} MiB/s (decompressed)')
-            self.log.info(f' + Disk\t- {w_speed / 1024 / 1024:.02f} MiB/s (write) / '
-                          f'{r_speed / 1024 / 1024:.02f} MiB/s (read)')
+            runtime = now - s_time
+            total_used = (num_shared_memory_segments - len(self.sms)) * segment_size_mib
+
+            # runtime/ETA are only shown in the log, skip computing and formatting all of it if INFO is disabled
+            if self.log.isEnabledFor(logging.INFO):
+                if runtime and processed_chunks:
+                    average_speed = processed_chunks / runtime
+                    estimate = (num_chunk_tasks - processed_chunks) / average_speed
+                    hours, estimate = int(estimate // 3600), estimate % 3600
+                    minutes, seconds = int(estimate // 60), int(estimate % 60)
+
+                    rt_hours, runtime = int(runtime // 3600), runtime % 3600
+                    rt_minutes, rt_seconds = int(runtime // 60), int(runtime % 60)
+                else:
+                    hours = minutes = seconds = 0
+                    rt_hours = rt_minutes = rt_seconds = 0
+
+                self.log.info(f'= Progress: {perc:.02f}% ({processed_chunks}/{num_chunk_tasks}), '
+                              f'Running for {rt_hours:02d}:{rt_minutes:02d}:{rt_seconds:02d}, '
+                              f'ETA: {hours:02d}:{minutes:02d}:{seconds:02d}')
+                self.log.info(f' - Downloaded: {total_dl / 1024 / 1024:.02f} MiB, '
+                              f'Written: {total_write / 1024 / 1024:.02f} MiB')
+                self.log.info(f' - Cache usage: {total_used:.02f} MiB, active tasks: {self.active_tasks}')
+                self.log.info(f' + Download\t- {dl_speed / 1024 / 1024:.02f} MiB/s (raw) '
+                              f'/ {dl_unc_speed / 1024 / 1024:.02f} MiB/s (decompressed)')
+                self.log.info(f' + Disk\t- {w_speed / 1024 / 1024:.02f} MiB/s (write) / '
+                              f'{r_speed / 1024 / 1024:.02f} MiB/s (read)')
 
             # send status update to back to instantiator (if queue exists)
             if self.status_queue:
                 try:
-                    self.status_queue.put(UIUpdate(
+                    self.status_queue.put_nowait(UIUpdate(
                         progress=perc, download_speed=dl_unc_speed, write_speed=w_speed, read_speed=r_speed,
                         memory_usage=total_used * 1024 * 1024
-                    ), timeout=1.0)
+                    ))
+                except Full:
+                    # consumer is falling behind, drop this update, the next one has more recent data anyway
+                    pass
                 except Exception as e:
                     self.log.warning(f'Failed to send status update to queue: {e!r}')
 
-            time.sleep(self.update_interval)
+            tasks_done.wait(self.update_interval)
 
         for i in range(self.max_workers):
             self.dl_worker_queue.put_nowait(TerminateWorkerTask())
@@ -148,7 +148,7 @@ class DLWorker(Process):
 
 
 class FileWorker(Process):
-    def __init__(self, queue, out_queue, base_path, shm, cache_path=None, logging_queue=None):
+    def __init__(self, queue, out_queue, base_path, shm, cache_path=None, logging_queue=None, max_batch_size=64):
         super().__init__(name='FileWorker')
         self.q = queue
         self.o_q = out_queue
@@ -157,6 +157,7 @@ class FileWorker(Process):
         self.shm = SharedMemory(name=shm)
         self.log_level = logging.getLogger().level
         self.logging_queue = logging_queue
+        self.max_batch_size = max_batch_size
 
     def run(self):
         # we have to fix up the logger before we can start
@@ -170,21 +171,34 @@ class FileWorker(Process):
 
         last_filename = ''
         current_file = None
+        # results are sent to the manager in batches, whenever there is no more work queued or the batch is full
+        results = []
 
         while True:
             try:
+                if len(results) >= self.max_batch_size:
+                    self.o_q.put(results)
+                    results = []
+
                 try:
-                    j: WriterTask = self.q.get(timeout=10.0)
+                    j: WriterTask = self.q.get_nowait()
                 except Empty:
-                    logger.warning('Writer queue empty!')
-                    continue
+                    if results:
+                        self.o_q.put(results)
+                        results = []
+                    try:
+                        j = self.q.get(timeout=10.0)
+                    except Empty:
+                        logger.warning('Writer queue empty!')
+                        continue
 
                 if isinstance(j, TerminateWorkerTask):
                     if current_file:
                         current_file.close()
                     logger.debug('Worker received termination signal, shutting down...')
                     # send termination task to results halnder as well
-                    self.o_q.put(TerminateWorkerTask())
+                    results.append(TerminateWorkerTask())
+                    self.o_q.put(results)
                     break
 
                 # make directories if required
@@ -196,7 +210,7 @@ class FileWorker(Process):
 
                 if j.flags & TaskFlags.CREATE_EMPTY_FILE:  # just create an empty file
                     open(full_path, 'a').close()
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
                 elif j.flags & TaskFlags.OPEN_FILE:
                     if current_file:
@@ -206,7 +220,7 @@ class FileWorker(Process):
                     current_file = open(full_path, 'wb')
                     last_filename = j.filename
 
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
                 elif j.flags & TaskFlags.CLOSE_FILE:
                     if current_file:
@@ -215,7 +229,7 @@ class FileWorker(Process):
                     else:
                         logger.warning(f'Asking to close file that is not open: {j.filename}')
 
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
                 elif j.flags & TaskFlags.RENAME_FILE:
                     if current_file:
@@ -227,17 +241,17 @@ class FileWorker(Process):
                             os.remove(full_path)
                         except OSError as e:
                             logger.error(f'Removing file failed: {e!r}')
-                            self.o_q.put(WriterTaskResult(success=False, **j.__dict__))
+                            results.append(WriterTaskResult(success=False, **j.__dict__))
                             continue
 
                     try:
                         os.rename(os.path.join(self.base_path, j.old_file), full_path)
                     except OSError as e:
                         logger.error(f'Renaming file failed: {e!r}')
-                        self.o_q.put(WriterTaskResult(success=False, **j.__dict__))
+                        results.append(WriterTaskResult(success=False, **j.__dict__))
                         continue
 
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
                 elif j.flags & TaskFlags.DELETE_FILE:
                     if current_file:
@@ -251,7 +265,7 @@ class FileWorker(Process):
                         if not j.flags & TaskFlags.SILENT:
                             logger.error(f'Removing file failed: {e!r}')
 
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
                 elif j.flags & TaskFlags.MAKE_EXECUTABLE:
                     if current_file:
@@ -266,7 +280,7 @@ class FileWorker(Process):
                         if not j.flags & TaskFlags.SILENT:
                             logger.error(f'chmod\'ing file failed: {e!r}')
 
-                    self.o_q.put(WriterTaskResult(success=True, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, **j.__dict__))
                     continue
 
                 try:
@@ -286,12 +300,12 @@ class FileWorker(Process):
                             current_file.write(f.read(j.chunk_size))
                 except Exception as e:
                     logger.warning(f'Something in writing a file failed: {e!r}')
-                    self.o_q.put(WriterTaskResult(success=False, size=j.chunk_size, **j.__dict__))
+                    results.append(WriterTaskResult(success=False, size=j.chunk_size, **j.__dict__))
                 else:
-                    self.o_q.put(WriterTaskResult(success=True, size=j.chunk_size, **j.__dict__))
+                    results.append(WriterTaskResult(success=True, size=j.chunk_size, **j.__dict__))
             except Exception as e:
                 logger.warning(f'Job {j.filename} failed with: {e!r}, fetching next one...')
-                self.o_q.put(WriterTaskResult(success=False, **j.__dict__))
+                results.append(WriterTaskResult(success=False, **j.__dict__))
 
                 try:
                     if current_file:
@@ -98,6 +98,10 @@ def validate_files(base_path: str, filelist: List[tuple], hash_type='sha1',
     if not os.path.exists(base_path):
         raise OSError('Path does not exist')
 
+    # files are read into a single re-used buffer instead of allocating new bytes objects for every block
+    read_buffer = bytearray(1024 * 1024)
+    read_view = memoryview(read_buffer)
+
     for file_path, file_hash in filelist:
         full_path = os.path.join(base_path, file_path)
         # logger.debug(f'Checking "{file_path}"...')
@@ -123,8 +127,8 @@ def validate_files(base_path: str, filelist: List[tuple], hash_type='sha1',
             with open(full_path, 'rb') as f:
                 real_file_hash = hashlib.new(hash_type)
                 i = 0
-                while chunk := f.read(1024*1024):
-                    real_file_hash.update(chunk)
+                while read_size := f.readinto(read_buffer):
+                    real_file_hash.update(read_view[:read_size])
                     if show_progress and i % interval == 0:
                         pos = f.tell()
                         perc = (pos / _size) * 100
@@ -154,6 +158,33 @@ def clean_filename(filename):
     return ''.join(i for i in filename if i not in '<>:"/\\|?*')
 
 
+def list_files(path: str) -> set:
+    """
+    Get the paths of all files below a directory with a single walk of the directory tree
+
+    :param path: directory to scan
+    :return: set of file paths relative to path, using "/" as separator
+    """
+    files = set()
+    dirs = ['']
+    while dirs:
+        rel_dir = dirs.pop()
+        try:
+            it = os.scandir(os.path.join(path, rel_dir))
+        except OSError:
+            continue
+
+        with it:
+            for entry in it:
+                rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel_path)
+                elif entry.is_file():
+                    files.add(rel_path)
+
+    return files
+
+
 def get_dir_size(path):
     return sum(f.stat().st_size for f in Path(path).glob('**/*') if f.is_file())
 
@@ -8,7 +8,7 @@ from typing import Optional
 from .manifest import ManifestComparison
 
 
-@dataclass
+@dataclass(slots=True)
 class SharedMemorySegment:
     """
     Segment of the shared memory used for one Chunk
@@ -41,7 +41,7 @@ class DownloaderTaskResult(DownloaderTask):
     size_decompressed: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkTask:
     """
     A task describing a single read of a (partial) chunk from memory or an existing file
@@ -67,7 +67,7 @@ class TaskFlags(Flag):
     SILENT = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class FileTask:
     """
     A task describing some operation on the filesystem
@@ -136,6 +136,7 @@ class AnalysisResult:
     min_memory: int = 0
     num_chunks: int = 0
     num_chunks_cache: int = 0
+    num_chunk_tasks: int = 0
     num_files: int = 0
     removed: int = 0
     added: int = 0
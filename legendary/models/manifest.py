@@ -15,24 +15,35 @@ from typing import Optional
 
 logger = logging.getLogger('Manifest')
 
+# precompiled structs for the fixed-size parts of the binary format
+_int32 = struct.Struct('<i')
+_uint32 = struct.Struct('<I')
+_guid = struct.Struct('<IIII')
+# big endian guid, used for the hex string representation
+_guid_be = struct.Struct('>IIII')
+# magic, header size, uncompressed size, compressed size, sha1, stored as, version
+_manifest_header = struct.Struct('<IIII20sBI')
+# size, data version, feature level, is file data, app id
+_meta_header = struct.Struct('<IBIBI')
+# size, version, count (CDL, FML, custom fields)
+_list_header = struct.Struct('<IBI')
+# size, guid (4x uint32), offset, size
+_chunk_part = struct.Struct('<IIIIIII')
+
 
 def read_fstring(bio):
-    length = struct.unpack('<i', bio.read(4))[0]
+    length = _int32.unpack(bio.read(4))[0]
 
+    # the terminators are read along with the string and sliced off, which saves a seek per string
+    if length > 0:
+        return bio.read(length)[:-1].decode('ascii')  # one byte null terminator
     # if the length is negative the string is UTF-16 encoded, this was a pain to figure out.
-    if length < 0:
+    elif length < 0:
         # utf-16 chars are (generally) 2 bytes wide, but the length is # of characters, not bytes.
         # 4-byte wide chars exist, but best I can tell Epic's (de)serializer doesn't support those.
-        length *= -2
-        s = bio.read(length - 2).decode('utf-16')
-        bio.seek(2, 1)  # utf-16 strings have two byte null terminators
-    elif length > 0:
-        s = bio.read(length - 1).decode('ascii')
-        bio.seek(1, 1)  # skip string null terminator
+        return bio.read(length * -2)[:-2].decode('utf-16')  # two byte null terminator
     else:  # empty string, no terminators or anything
-        s = ''
-
-    return s
+        return ''
 
 
 def write_fstring(bio, string):
@@ -74,7 +85,7 @@ class Manifest:
         self.header_size = 41
         self.size_compressed = 0
         self.size_uncompressed = 0
-        self.sha_hash = ''
+        self.sha_hash = b''
         self.stored_as = 0
         self.version = 18
         self.secret_guid = (0,0,0,0)
@@ -153,35 +164,49 @@ class Manifest:
 
     @classmethod
     def read(cls, data):
-        bio = BytesIO(data)
-        if struct.unpack('<I', bio.read(4))[0] != cls.header_magic:
+        if _uint32.unpack_from(data)[0] != cls.header_magic:
             raise ValueError('No header magic!')
 
         _manifest = cls()
-        _manifest.header_size = struct.unpack('<I', bio.read(4))[0]
-        _manifest.size_uncompressed = struct.unpack('<I', bio.read(4))[0]
-        _manifest.size_compressed = struct.unpack('<I', bio.read(4))[0]
-        _manifest.sha_hash = bio.read(20)
-        _manifest.stored_as = struct.unpack('B', bio.read(1))[0]
-        _manifest.version = struct.unpack('<I', bio.read(4))[0]
+        (_, _manifest.header_size, _manifest.size_uncompressed, _manifest.size_compressed,
+         _manifest.sha_hash, _manifest.stored_as, _manifest.version) = _manifest_header.unpack_from(data)
+        offset = _manifest_header.size
         if _manifest.version >= 22:
-            _manifest.secret_guid = struct.unpack('<IIII', bio.read(16))
-            _manifest.encryption_tag = bio.read(16)
+            _manifest.secret_guid = _guid.unpack_from(data, offset)
+            _manifest.encryption_tag = data[offset + 16:offset + 32]
+            offset += 32
 
-        if bio.tell() != _manifest.header_size:
-            logger.warning(f'Did not read entire header {bio.tell()} != {_manifest.header_size}! '
+        if offset != _manifest.header_size:
+            logger.warning(f'Did not read entire header {offset} != {_manifest.header_size}! '
                            f'Header version: {_manifest.version}, please report this on '
                            f'GitHub along with a sample of the problematic manifest!')
-            bio.seek(_manifest.header_size)
 
-        data = bio.read()
         if _manifest.compressed:
-            _manifest.data = zlib.decompress(data)
-            dec_hash = hashlib.sha1(_manifest.data).hexdigest()
-            if dec_hash != _manifest.sha_hash.hex():
+            # decompress and hash block by block so each block is hashed while it's still in the cache
+            decompressor = zlib.decompressobj()
+            sha1 = hashlib.sha1()
+            blocks = []
+            remaining = _manifest.size_uncompressed
+            block_size = 256 * 1024
+            body = memoryview(data)[_manifest.header_size:]
+            for pos in range(0, len(body), block_size):
+                # never produce more than one byte past the expected size, so broken data is rejected early
+                block = decompressor.decompress(body[pos:pos + block_size], remaining + 1)
+                if (remaining := remaining - len(block)) < 0:
+                    raise ValueError('Decompressed data is larger than expected!')
+                sha1.update(block)
+                blocks.append(block)
+            block = decompressor.flush()
+            if len(block) > remaining:
+                raise ValueError('Decompressed data is larger than expected!')
+            sha1.update(block)
+            blocks.append(block)
+
+            if sha1.digest() != _manifest.sha_hash:
                 raise ValueError('Hash does not match!')
+            _manifest.data = b''.join(blocks)
         else:
-            _manifest.data = data
+            _manifest.data = data[_manifest.header_size:]
 
         return _manifest
 
@@ -242,41 +267,45 @@ class Manifest:
         return bio.tell() if fp else bio.getvalue()
 
     def apply_delta_manifest(self, delta_manifest: Manifest):
+        fml = self.file_manifest_list
+        cdl = self.chunk_data_list
         added = set()
-        # overwrite file elements with the ones from the delta manifest
-        for idx, file_elem in enumerate(self.file_manifest_list.elements):
+        # overwrite file elements with the ones from the delta manifest,
+        # the path map stays valid for those since the file names don't change
+        for idx, file_elem in enumerate(fml.elements):
             try:
                 delta_file = delta_manifest.file_manifest_list.get_file_by_path(file_elem.filename)
-                self.file_manifest_list.elements[idx] = delta_file
+                fml.elements[idx] = delta_file
                 added.add(delta_file.filename)
             except ValueError:
                 pass
 
-        # add other files that may be missing
+        # add other files that may be missing, and add them to the path map if it has been built already
         for delta_file in delta_manifest.file_manifest_list.elements:
             if delta_file.filename not in added:
-                self.file_manifest_list.elements.append(delta_file)
-        # update count and clear map
-        self.file_manifest_list.count = len(self.file_manifest_list.elements)
-        self.file_manifest_list._path_map = None
+                if fml._path_map:
+                    fml._path_map[delta_file.filename] = len(fml.elements)
+                fml.elements.append(delta_file)
+        # update count
+        fml.count = len(fml.elements)
 
         # ensure guid map exists (0 will most likely yield no result, so ignore ValueError)
         try:
-            self.chunk_data_list.get_chunk_by_guid(0)
+            cdl.get_chunk_by_guid(0)
         except ValueError:
             pass
 
-        # add new chunks from delta manifest to main manifest and again clear maps and update count
-        existing_chunk_guids = self.chunk_data_list._guid_int_map.keys()
-
+        # add new chunks from delta manifest to main manifest and update the maps and count
         for chunk in delta_manifest.chunk_data_list.elements:
-            if chunk.guid_num not in existing_chunk_guids:
-                self.chunk_data_list.elements.append(chunk)
+            if chunk.guid_num not in cdl._guid_int_map:
+                cdl._guid_int_map[chunk.guid_num] = len(cdl.elements)
+                if cdl._guid_map:
+                    cdl._guid_map[chunk.guid_str] = len(cdl.elements)
+                if cdl._path_map:
+                    cdl._path_map[chunk.path] = len(cdl.elements)
+                cdl.elements.append(chunk)
 
-        self.chunk_data_list.count = len(self.chunk_data_list.elements)
-        self.chunk_data_list._guid_map = None
-        self.chunk_data_list._guid_int_map = None
-        self.chunk_data_list._path_map = None
+        cdl.count = len(cdl.elements)
 
 
 class ManifestMeta:
@@ -317,22 +346,20 @@ class ManifestMeta:
     def read(cls, bio):
         _meta = cls()
 
-        _meta.meta_size = struct.unpack('<I', bio.read(4))[0]
-        _meta.data_version = struct.unpack('B', bio.read(1))[0]
-        # Usually same as manifest version, but can be different
+        # Feature level is usually same as manifest version, but can be different
         # e.g. if JSON manifest has been converted to binary manifest.
-        _meta.feature_level = struct.unpack('<I', bio.read(4))[0]
-        # As far as I can tell this was used for very old manifests that didn't use chunks at all
-        _meta.is_file_data = struct.unpack('B', bio.read(1))[0] == 1
-        # 0 for most apps, generally not used
-        _meta.app_id = struct.unpack('<I', bio.read(4))[0]
+        # is_file_data was (as far as I can tell) used for very old manifests that didn't use chunks at all,
+        # app_id is 0 for most apps and generally not used.
+        (_meta.meta_size, _meta.data_version, _meta.feature_level,
+         is_file_data, _meta.app_id) = _meta_header.unpack(bio.read(_meta_header.size))
+        _meta.is_file_data = is_file_data == 1
         _meta.app_name = read_fstring(bio)
         _meta.build_version = read_fstring(bio)
         _meta.launch_exe = read_fstring(bio)
         _meta.launch_command = read_fstring(bio)
 
         # This is a list though I've never seen more than one entry
-        entries = struct.unpack('<I', bio.read(4))[0]
+        entries = _uint32.unpack(bio.read(4))[0]
         for _ in range(entries):
             _meta.prereq_ids.append(read_fstring(bio))
 
@@ -439,9 +466,7 @@ class CDL:
 
     def get_chunk_by_guid_num(self, guid_int) -> ChunkInfo:
         if not self._guid_int_map:
-            self._guid_int_map = dict()
-            for index, chunk in enumerate(self.elements):
-                self._guid_int_map[chunk.guid_num] = index
+            self._guid_int_map = {chunk.guid_num: index for index, chunk in enumerate(self.elements)}
 
         index = self._guid_int_map.get(guid_int, None)
         if index is None:
@@ -454,48 +479,48 @@ class CDL:
         _cdl = cls()
         _cdl._manifest_version = manifest_version
 
-        _cdl.size = struct.unpack('<I', bio.read(4))[0]
-        _cdl.version = struct.unpack('B', bio.read(1))[0]
-        _cdl.count = struct.unpack('<I', bio.read(4))[0]
+        _cdl.size, _cdl.version, _cdl.count = _list_header.unpack(bio.read(_list_header.size))
 
         # the way this data is stored is rather odd, maybe there's a nicer way to write this...
-
-        for _ in range(_cdl.count):
-            _cdl.elements.append(ChunkInfo(manifest_version=manifest_version))
+        # each column is read in one go and unpacked with a single struct call rather than field by field.
+        count = _cdl.count
+        _cdl.elements = [ChunkInfo(manifest_version=manifest_version) for _ in range(count)]
 
         # guid, doesn't seem to be a standard like UUID but is fairly straightfoward, 4 bytes, 128 bit.
-        for chunk in _cdl.elements:
-            chunk.guid = struct.unpack('<IIII', bio.read(16))
+        for chunk, guid in zip(_cdl.elements, _guid.iter_unpack(bio.read(16 * count))):
+            chunk.guid = guid
 
         # hash is a 64 bit integer, no idea how it's calculated but we don't need to know that.
-        for chunk in _cdl.elements:
-            chunk.hash = struct.unpack('<Q', bio.read(8))[0]
+        for chunk, _hash in zip(_cdl.elements, struct.unpack(f'<{count}Q', bio.read(8 * count))):
+            chunk.hash = _hash
 
         # sha1 hash
-        for chunk in _cdl.elements:
-            chunk.sha_hash = bio.read(20)
+        sha_hashes = bio.read(20 * count)
+        for chunk, offset in zip(_cdl.elements, range(0, 20 * count, 20)):
+            chunk.sha_hash = sha_hashes[offset:offset + 20]
 
         # group number, seems to be part of the download path
-        for chunk in _cdl.elements:
-            chunk.group_num = struct.unpack('B', bio.read(1))[0]
+        for chunk, group_num in zip(_cdl.elements, bio.read(count)):
+            chunk.group_num = group_num
 
         # window size is the uncompressed size
-        for chunk in _cdl.elements:
-            chunk.window_size = struct.unpack('<I', bio.read(4))[0]
+        for chunk, window_size in zip(_cdl.elements, struct.unpack(f'<{count}I', bio.read(4 * count))):
+            chunk.window_size = window_size
 
         # file size is the compressed size that will need to be downloaded
-        for chunk in _cdl.elements:
-            chunk.file_size = struct.unpack('<q', bio.read(8))[0]
+        for chunk, file_size in zip(_cdl.elements, struct.unpack(f'<{count}q', bio.read(8 * count))):
+            chunk.file_size = file_size
 
         if manifest_version >= 22:
-            for chunk in _cdl.elements:
-                chunk.secret_guid = struct.unpack('<IIII', bio.read(16))
+            for chunk, secret_guid in zip(_cdl.elements, _guid.iter_unpack(bio.read(16 * count))):
+                chunk.secret_guid = secret_guid
 
-            for chunk in _cdl.elements:
-                chunk.window_size_compressed = struct.unpack('<I', bio.read(4))[0]
-                
-            for chunk in _cdl.elements:
-                chunk.encryption_tag = bio.read(16)
+            for chunk, window_size in zip(_cdl.elements, struct.unpack(f'<{count}I', bio.read(4 * count))):
+                chunk.window_size_compressed = window_size
+
+            encryption_tags = bio.read(16 * count)
+            for chunk, offset in zip(_cdl.elements, range(0, 16 * count, 16)):
+                chunk.encryption_tag = encryption_tags[offset:offset + 16]
 
         if (size_read := bio.tell() - cdl_start) != _cdl.size:
             logger.warning(f'Did not read entire chunk data list! Version: {_cdl.version}, '
@@ -508,32 +533,21 @@ class CDL:
 
     def write(self, bio):
         cdl_start = bio.tell()
-        bio.write(struct.pack('<I', 0))  # placeholder size
-        bio.write(struct.pack('B', self.version))
-        bio.write(struct.pack('<I', len(self.elements)))
-
-        for chunk in self.elements:
-            bio.write(struct.pack('<IIII', *chunk.guid))
-        for chunk in self.elements:
-            bio.write(struct.pack('<Q', chunk.hash))
-        for chunk in self.elements:
-            bio.write(chunk.sha_hash)
-        for chunk in self.elements:
-            bio.write(struct.pack('B', chunk.group_num))
-        for chunk in self.elements:
-            bio.write(struct.pack('<I', chunk.window_size))
-        for chunk in self.elements:
-            bio.write(struct.pack('<q', chunk.file_size))
+        count = len(self.elements)
+        bio.write(_list_header.pack(0, self.version, count))  # placeholder size
 
-        if self._manifest_version >= 22:
-            for chunk in self.elements:
-                bio.write(struct.pack('<IIII', *chunk.secret_guid))
+        # each column is packed and written in one go
+        bio.write(b''.join(_guid.pack(*chunk.guid) for chunk in self.elements))
+        bio.write(struct.pack(f'<{count}Q', *(chunk.hash for chunk in self.elements)))
+        bio.write(b''.join(chunk.sha_hash for chunk in self.elements))
+        bio.write(bytes(chunk.group_num for chunk in self.elements))
+        bio.write(struct.pack(f'<{count}I', *(chunk.window_size for chunk in self.elements)))
+        bio.write(struct.pack(f'<{count}q', *(chunk.file_size for chunk in self.elements)))
 
-            for chunk in self.elements:
-                bio.write(struct.pack('<I', chunk.window_size_compressed))
-                
-            for chunk in self.elements:
-                bio.write(chunk.encryption_tag)
+        if self._manifest_version >= 22:
+            bio.write(b''.join(_guid.pack(*chunk.secret_guid) for chunk in self.elements))
+            bio.write(struct.pack(f'<{count}I', *(chunk.window_size_compressed for chunk in self.elements)))
+            bio.write(b''.join(chunk.encryption_tag for chunk in self.elements))
 
         cdl_end = bio.tell()
         bio.seek(cdl_start)
@@ -542,6 +556,10 @@ class CDL:
 
 
 class ChunkInfo:
+    # manifests can contain tens of thousands of chunks and files, slots keep the per-object overhead down
+    __slots__ = ('guid', 'hash', 'sha_hash', 'window_size', 'file_size', 'secret_guid', 'window_size_compressed',
+                 'encryption_tag', '_manifest_version', '_group_num', '_guid_str', '_guid_num')
+
     def __init__(self, manifest_version=18):
         self.guid = None
         self.hash = 0
@@ -566,27 +584,22 @@ class ChunkInfo:
     @property
     def guid_str(self):
         if not self._guid_str:
-            self._guid_str = '-'.join('{:08x}'.format(g) for g in self.guid)
+            self._guid_str = _guid_be.pack(*self.guid).hex('-', 4)
 
         return self._guid_str
 
     @property
     def guid_num(self):
-        if not self._guid_num:
+        if self._guid_num is None:
             self._guid_num = self.guid[3] + (self.guid[2] << 32) + (self.guid[1] << 64) + (self.guid[0] << 96)
         return self._guid_num
 
     @property
     def group_num(self):
-        if self._guid_num is not None:
+        if self._group_num is not None:
             return self._group_num
 
-        self._group_num = (zlib.crc32(
-            struct.pack('<I', self.guid[0]) +
-            struct.pack('<I', self.guid[1]) +
-            struct.pack('<I', self.guid[2]) +
-            struct.pack('<I', self.guid[3])
-        ) & 0xffffffff) % 100
+        self._group_num = zlib.crc32(_guid.pack(*self.guid)) % 100
         return self._group_num
 
     @group_num.setter
@@ -595,16 +608,13 @@ class ChunkInfo:
 
     @property
     def path(self):
+        chunk_dir = get_chunk_dir(self._manifest_version)
         if self._manifest_version >= 22:
-            secret_b64 = base64.urlsafe_b64encode(struct.pack('<IIII', *self.secret_guid)).decode().strip('=')
+            secret_b64 = base64.urlsafe_b64encode(_guid.pack(*self.secret_guid)).decode().strip('=')
             hash_b64 = base64.urlsafe_b64encode(struct.pack('<Q', self.hash)).decode().strip('=')
-            guid_b64 = base64.urlsafe_b64encode(struct.pack('<IIII', *self.guid)).decode().strip('=')
-            return '{}/{}/{:02d}/{}_{}.chunk'.format(
-                get_chunk_dir(self._manifest_version), secret_b64,
-                self.group_num, hash_b64, guid_b64)
-        return '{}/{:02d}/{:016X}_{}.chunk'.format(
-            get_chunk_dir(self._manifest_version), self.group_num,
-            self.hash, ''.join('{:08X}'.format(g) for g in self.guid))
+            guid_b64 = base64.urlsafe_b64encode(_guid.pack(*self.guid)).decode().strip('=')
+            return f'{chunk_dir}/{secret_b64}/{self.group_num:02d}/{hash_b64}_{guid_b64}.chunk'
+        return f'{chunk_dir}/{self.group_num:02d}/{self.hash:016X}_{_guid_be.pack(*self.guid).hex().upper()}.chunk'
 
 
 class FML:
@@ -631,12 +641,9 @@ class FML:
     def read(cls, bio):
         fml_start = bio.tell()
         _fml = cls()
-        _fml.size = struct.unpack('<I', bio.read(4))[0]
-        _fml.version = struct.unpack('B', bio.read(1))[0]
-        _fml.count = struct.unpack('<I', bio.read(4))[0]
+        _fml.size, _fml.version, _fml.count = _list_header.unpack(bio.read(_list_header.size))
 
-        for _ in range(_fml.count):
-            _fml.elements.append(FileManifest())
+        _fml.elements = [FileManifest() for _ in range(_fml.count)]
 
         for fm in _fml.elements:
             fm.filename = read_fstring(bio)
@@ -651,36 +658,46 @@ class FML:
 
         # Flags, the only one I've seen is for executables
         for fm in _fml.elements:
-            fm.flags = struct.unpack('B', bio.read(1))[0]
+            fm.flags = bio.read(1)[0]
 
         # install tags, no idea what they do, I've only seen them in the Fortnite manifest
         for fm in _fml.elements:
-            _elem = struct.unpack('<I', bio.read(4))[0]
-            for _ in range(_elem):
-                fm.install_tags.append(read_fstring(bio))
+            _elem = _uint32.unpack(bio.read(4))[0]
+            fm.install_tags = [read_fstring(bio) for _ in range(_elem)]
 
         # Each file is made up of "Chunk Parts" that can be spread across the "chunk stream"
         for fm in _fml.elements:
-            _elem = struct.unpack('<I', bio.read(4))[0]
+            _elem = _uint32.unpack(bio.read(4))[0]
+            _start = bio.tell()
+            _offset = 0
+            # All chunk parts I've seen are 28 bytes, so unpack all of a file's parts in one go
+            for _size, g0, g1, g2, g3, offset, size in _chunk_part.iter_unpack(bio.read(_chunk_part.size * _elem)):
+                if _size != _chunk_part.size:
+                    break
+                fm.chunk_parts.append(ChunkPart(guid=(g0, g1, g2, g3), offset=offset, size=size, file_offset=_offset))
+                _offset += size
+            else:
+                # we have to calculate the actual file size ourselves
+                fm.file_size = _offset
+                continue
+
+            # a part with a different size was encountered, go back and read them one by one
+            bio.seek(_start)
+            fm.chunk_parts.clear()
             _offset = 0
             for _ in range(_elem):
-                chunkp = ChunkPart()
-                _start = bio.tell()
-                _size = struct.unpack('<I', bio.read(4))[0]
-                chunkp.guid = struct.unpack('<IIII', bio.read(16))
-                chunkp.offset = struct.unpack('<I', bio.read(4))[0]
-                chunkp.size = struct.unpack('<I', bio.read(4))[0]
-                chunkp.file_offset = _offset
-                fm.chunk_parts.append(chunkp)
-                _offset += chunkp.size
-                if (diff := (bio.tell() - _start - _size)) > 0:
+                _size, g0, g1, g2, g3, offset, size = _chunk_part.unpack(bio.read(_chunk_part.size))
+                fm.chunk_parts.append(ChunkPart(guid=(g0, g1, g2, g3), offset=offset, size=size, file_offset=_offset))
+                _offset += size
+                if (diff := (_size - _chunk_part.size)) > 0:
                     logger.warning(f'Did not read {diff} bytes from chunk part!')
-                    bio.seek(diff)
+                    bio.seek(diff, 1)
+            fm.file_size = _offset
 
         # MD5 hash + MIME type (Manifest feature level 19)
         if _fml.version >= 1:
             for fm in _fml.elements:
-                _has_md5 = struct.unpack('<I', bio.read(4))[0]
+                _has_md5 = _uint32.unpack(bio.read(4))[0]
                 if _has_md5 != 0:
                     fm.hash_md5 = bio.read(16)
 
@@ -692,10 +709,6 @@ class FML:
             for fm in _fml.elements:
                 fm.hash_sha256 = bio.read(32)
 
-        # we have to calculate the actual file size ourselves
-        for fm in _fml.elements:
-            fm.file_size = sum(c.size for c in fm.chunk_parts)
-
         if (size_read := bio.tell() - fml_start) != _fml.size:
             logger.warning(f'Did not read entire file data list! Version: {_fml.version}, '
                            f'{_fml.size - size_read} bytes missing, skipping...')
@@ -707,9 +720,7 @@ class FML:
 
     def write(self, bio):
         fml_start = bio.tell()
-        bio.write(struct.pack('<I', 0))  # placeholder size
-        bio.write(struct.pack('B', self.version))
-        bio.write(struct.pack('<I', len(self.elements)))
+        bio.write(_list_header.pack(0, self.version, len(self.elements)))  # placeholder size
 
         for fm in self.elements:
             write_fstring(bio, fm.filename)
@@ -726,13 +737,10 @@ class FML:
 
         # finally, write the chunk parts
         for fm in self.elements:
-            bio.write(struct.pack('<I', len(fm.chunk_parts)))
+            bio.write(_uint32.pack(len(fm.chunk_parts)))
+            # size is always 28 bytes (4 size + 16 guid + 4 offset + 4 size)
             for cp in fm.chunk_parts:
-                # size is always 28 bytes (4 size + 16 guid + 4 offset + 4 size)
-                bio.write(struct.pack('<I', 28))
-                bio.write(struct.pack('<IIII', *cp.guid))
-                bio.write(struct.pack('<I', cp.offset))
-                bio.write(struct.pack('<I', cp.size))
+                bio.write(_chunk_part.pack(_chunk_part.size, *cp.guid, cp.offset, cp.size))
 
         if self.version >= 1:
             for fm in self.elements:
@@ -755,6 +763,9 @@ class FML:
 
 
 class FileManifest:
+    __slots__ = ('filename', 'symlink_target', 'hash', 'flags', 'install_tags', 'chunk_parts', 'file_size',
+                 'hash_md5', 'mime_type', 'hash_sha256')
+
     def __init__(self):
         self.filename = ''
         self.symlink_target = ''
@@ -800,6 +811,8 @@ class FileManifest:
 
 
 class ChunkPart:
+    __slots__ = ('guid', 'offset', 'size', 'file_offset', '_guid_str', '_guid_num')
+
     def __init__(self, guid=None, offset=0, size=0, file_offset=0):
         self.guid = guid
         self.offset = offset
@@ -812,19 +825,18 @@ class ChunkPart:
     @property
     def guid_str(self):
         if not self._guid_str:
-            self._guid_str = '-'.join('{:08x}'.format(g) for g in self.guid)
+            self._guid_str = _guid_be.pack(*self.guid).hex('-', 4)
         return self._guid_str
 
     @property
     def guid_num(self):
-        if not self._guid_num:
+        if self._guid_num is None:
             self._guid_num = self.guid[3] + (self.guid[2] << 32) + (self.guid[1] << 64) + (self.guid[0] << 96)
         return self._guid_num
 
     def __repr__(self):
-        guid_readable = '-'.join('{:08x}'.format(g) for g in self.guid)
         return '<ChunkPart (guid={}, offset={}, size={}, file_offset={})>'.format(
-            guid_readable, self.offset, self.size, self.file_offset)
+            self.guid_str, self.offset, self.size, self.file_offset)
 
 
 class CustomFields:
@@ -858,9 +870,7 @@ class CustomFields:
         _cf = cls()
 
         cf_start = bio.tell()
-        _cf.size = struct.unpack('<I', bio.read(4))[0]
-        _cf.version = struct.unpack('B', bio.read(1))[0]
-        _cf.count = struct.unpack('<I', bio.read(4))[0]
+        _cf.size, _cf.version, _cf.count = _list_header.unpack(bio.read(_list_header.size))
 
         _keys = [read_fstring(bio) for _ in range(_cf.count)]
         _values = [read_fstring(bio) for _ in range(_cf.count)]